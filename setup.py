@@ -5,9 +5,12 @@ setup(
     version="0.1.0",
     packages=find_packages("src"),
     package_dir={"": "src"},
+    install_requires=[
+        "jeepney>=0.7",
+    ],
     entry_points={
         "console_scripts": [
-            "archsecure = archsecure.main:main",
+            "archsecure = archsecure.main:cli",
         ],
     },
 )
@@ -0,0 +1,356 @@
+import os
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+DEFAULT_SYSFS_ROOT = "/sys"
+
+# USB interface classes (bInterfaceClass).
+USB_CLASS_AUDIO = 0x01
+USB_CLASS_HUB = 0x09
+USB_CLASS_VIDEO = 0x0e
+
+# PCI class codes, as (class, subclass).
+PCI_CLASS_AUDIO = (0x04, 0x01)
+PCI_CLASS_HDA = (0x04, 0x03)
+PCI_CLASS_FIREWIRE = (0x0c, 0x00)
+
+# Thunderbolt/USB4 host controllers (NHI). USB4 hosts have their own class code;
+# Intel Thunderbolt 1-4 hosts report "system peripheral, other" and are only told
+# apart by device ID, as in drivers/thunderbolt/nhi.c.
+PCI_CLASS_CODE_USB4 = 0x0c0340
+PCI_CLASS_SYSTEM_OTHER = (0x08, 0x80)
+PCI_VENDOR_INTEL = "8086"
+INTEL_THUNDERBOLT_NHI_IDS = frozenset((
+    "1513", "1547", "156a", "156c", "1575", "1577", "15bf", "15d2", "15d9", "15e8", "15eb",
+    "8a0d", "8a17", "9a1b", "9a1d", "9a1f", "9a21", "463e", "466d", "a73e", "a76d",
+    "7eb2", "7ec2", "7ec3", "a833", "a834", "5781", "5784", "e333", "e334", "e433", "e434",
+))
+
+
+class UsbDevice(NamedTuple):
+    port: str
+    vendor_id: str
+    product_id: str
+    serial: str
+    name: str
+    interfaces: Tuple[Tuple[int, int, int], ...]
+
+    @property
+    def is_hub(self) -> bool:
+        """
+        True if the device exposes a hub interface.
+        """
+        return any(iface[0] == USB_CLASS_HUB for iface in self.interfaces)
+
+    def has_interface_class(self, iface_class: int) -> bool:
+        """
+        Return True if any of the device's interfaces has the given class.
+
+        :param iface_class: A bInterfaceClass value, e.g. USB_CLASS_VIDEO.
+        :return: True if an interface matches.
+        """
+        return any(iface[0] == iface_class for iface in self.interfaces)
+
+
+class RfkillDevice(NamedTuple):
+    name: str
+    type: str
+    soft_blocked: bool
+    hard_blocked: bool
+
+
+class ThunderboltDevice(NamedTuple):
+    name: str
+    vendor_name: str
+    device_name: str
+    authorized: bool
+
+
+class PciDevice(NamedTuple):
+    address: str
+    class_code: int
+    vendor_id: str
+    device_id: str
+    driver: str
+
+    @property
+    def class_pair(self) -> Tuple[int, int]:
+        """
+        The (class, subclass) part of the class code, without the programming interface.
+        """
+        return (self.class_code >> 16, (self.class_code >> 8) & 0xff)
+
+    @property
+    def is_thunderbolt_host(self) -> bool:
+        """
+        True if this is a Thunderbolt or USB4 host controller, whether or not its driver is loaded.
+        """
+        if self.class_code == PCI_CLASS_CODE_USB4:
+            return True
+        return self.class_pair == PCI_CLASS_SYSTEM_OTHER and (
+            self.driver == "thunderbolt"
+            or (self.vendor_id == PCI_VENDOR_INTEL and self.device_id in INTEL_THUNDERBOLT_NHI_IDS)
+        )
+
+
+def _read(path: str) -> Optional[str]:
+    """
+    Read a sysfs attribute, returning None if it is missing or unreadable.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8", "replace").strip()
+    except OSError:
+        return None
+
+
+def _parse_hex(value: Optional[str]) -> Optional[int]:
+    """
+    Parse a hex sysfs value, returning None if it is missing or malformed.
+    """
+    try:
+        return int(value, 16) if value else None
+    except ValueError:
+        return None
+
+
+def _read_hex(path: str) -> int:
+    """
+    Read a hex sysfs attribute, returning 0 if it is missing or malformed.
+    """
+    value = _parse_hex(_read(path))
+    return 0 if value is None else value
+
+
+def _scandir(path: str) -> List[os.DirEntry]:
+    """
+    List a sysfs directory in one pass, sorted by name; an absent directory yields nothing.
+    """
+    try:
+        with os.scandir(path) as it:
+            return sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return []
+
+
+def _scan_usb(sysfs_root: str) -> Tuple[UsbDevice, ...]:
+    """
+    Read USB devices and their interfaces from /sys/bus/usb, skipping interface nodes.
+    """
+    devices = []
+    for entry in _scandir(os.path.join(sysfs_root, "bus", "usb", "devices")):
+        # Interface nodes ("1-1:1.0") are picked up under their device below.
+        if ":" in entry.name:
+            continue
+        vendor_id = _read(os.path.join(entry.path, "idVendor"))
+        if vendor_id is None:
+            continue
+        interfaces = []
+        for child in _scandir(entry.path):
+            if ":" not in child.name:
+                continue
+            iface_class = _parse_hex(_read(os.path.join(child.path, "bInterfaceClass")))
+            if iface_class is None:
+                continue
+            interfaces.append((
+                iface_class,
+                _read_hex(os.path.join(child.path, "bInterfaceSubClass")),
+                _read_hex(os.path.join(child.path, "bInterfaceProtocol")),
+            ))
+        devices.append(UsbDevice(
+            port=entry.name,
+            vendor_id=vendor_id,
+            product_id=_read(os.path.join(entry.path, "idProduct")) or "0000",
+            serial=_read(os.path.join(entry.path, "serial")) or "",
+            name=_read(os.path.join(entry.path, "product")) or "",
+            interfaces=tuple(interfaces),
+        ))
+    return tuple(devices)
+
+
+def _scan_rfkill(sysfs_root: str) -> Tuple[RfkillDevice, ...]:
+    """
+    Read radio devices and their block state from /sys/class/rfkill.
+    """
+    devices = []
+    for entry in _scandir(os.path.join(sysfs_root, "class", "rfkill")):
+        devices.append(RfkillDevice(
+            name=_read(os.path.join(entry.path, "name")) or entry.name,
+            type=_read(os.path.join(entry.path, "type")) or "",
+            soft_blocked=_read(os.path.join(entry.path, "soft")) == "1",
+            hard_blocked=_read(os.path.join(entry.path, "hard")) == "1",
+        ))
+    return tuple(devices)
+
+
+def _scan_thunderbolt(sysfs_root: str) -> Tuple[ThunderboltDevice, ...]:
+    """
+    Read devices on the Thunderbolt bus from /sys/bus/thunderbolt.
+    """
+    devices = []
+    for entry in _scandir(os.path.join(sysfs_root, "bus", "thunderbolt", "devices")):
+        # Domains and XDomain services carry no device_name.
+        device_name = _read(os.path.join(entry.path, "device_name"))
+        if device_name is None:
+            continue
+        devices.append(ThunderboltDevice(
+            name=entry.name,
+            vendor_name=_read(os.path.join(entry.path, "vendor_name")) or "",
+            device_name=device_name,
+            authorized=_read(os.path.join(entry.path, "authorized")) not in (None, "0"),
+        ))
+    return tuple(devices)
+
+
+def _scan_pci(sysfs_root: str) -> Tuple[PciDevice, ...]:
+    """
+    Read PCI functions with their class code, IDs and bound driver from /sys/bus/pci.
+    """
+    devices = []
+    for entry in _scandir(os.path.join(sysfs_root, "bus", "pci", "devices")):
+        try:
+            driver = os.path.basename(os.readlink(os.path.join(entry.path, "driver")))
+        except OSError:
+            driver = ""
+        devices.append(PciDevice(
+            address=entry.name,
+            class_code=_read_hex(os.path.join(entry.path, "class")),
+            vendor_id=(_read(os.path.join(entry.path, "vendor")) or "")[2:],
+            device_id=(_read(os.path.join(entry.path, "device")) or "")[2:],
+            driver=driver,
+        ))
+    return tuple(devices)
+
+
+def _policy_string(value: str) -> str:
+    """
+    Quote a string the way usbguard rule files expect.
+    """
+    escaped = []
+    for char in value:
+        if char in ('"', "\\"):
+            escaped.append("\\" + char)
+        elif not char.isprintable():
+            escaped.append("".join(f"\\x{byte:02x}" for byte in char.encode("utf-8")))
+        else:
+            escaped.append(char)
+    return '"' + "".join(escaped) + '"'
+
+
+class DeviceInventory:
+    """
+    An in-memory snapshot of the hardware the hardening steps care about.
+    """
+    def __init__(self, usb: Iterable[UsbDevice] = (), rfkill: Iterable[RfkillDevice] = (),
+                 thunderbolt: Iterable[ThunderboltDevice] = (), pci: Iterable[PciDevice] = ()) -> None:
+        """
+        Initialize a DeviceInventory.
+
+        :param usb: Connected USB devices, including hubs.
+        :param rfkill: Radio devices known to rfkill.
+        :param thunderbolt: Devices on the Thunderbolt bus.
+        :param pci: PCI functions.
+        """
+        self.usb = tuple(usb)
+        self.rfkill = tuple(rfkill)
+        self.thunderbolt = tuple(thunderbolt)
+        self.pci = tuple(pci)
+
+    @classmethod
+    def scan(cls, sysfs_root: str = DEFAULT_SYSFS_ROOT) -> 'DeviceInventory':
+        """
+        Build an inventory with one directory listing per bus.
+
+        :param sysfs_root: Where sysfs is mounted; point it at a fixture tree for testing.
+        :return: The scanned inventory.
+        """
+        return cls(
+            usb=_scan_usb(sysfs_root),
+            rfkill=_scan_rfkill(sysfs_root),
+            thunderbolt=_scan_thunderbolt(sysfs_root),
+            pci=_scan_pci(sysfs_root),
+        )
+
+    def wireless(self, rfkill_type: Optional[str] = None) -> Tuple[RfkillDevice, ...]:
+        """
+        Return rfkill devices, optionally only those of one type ("wlan", "bluetooth", ...).
+        """
+        return tuple(dev for dev in self.rfkill if rfkill_type is None or dev.type == rfkill_type)
+
+    def pci_with_class(self, *class_pairs: Tuple[int, int]) -> Tuple[PciDevice, ...]:
+        """
+        Return PCI functions whose (class, subclass) is one of class_pairs.
+
+        :param class_pairs: Pairs such as PCI_CLASS_FIREWIRE.
+        :return: The matching PCI functions.
+        """
+        return tuple(dev for dev in self.pci if dev.class_pair in class_pairs)
+
+    def usb_with_interface(self, iface_class: int) -> Tuple[UsbDevice, ...]:
+        """
+        Return USB devices with at least one interface of the given class.
+
+        :param iface_class: A bInterfaceClass value, e.g. USB_CLASS_AUDIO.
+        :return: The matching USB devices.
+        """
+        return tuple(dev for dev in self.usb if dev.has_interface_class(iface_class))
+
+    def thunderbolt_hosts(self) -> Tuple[PciDevice, ...]:
+        """
+        Return the Thunderbolt and USB4 host controllers found on the PCI bus.
+        """
+        return tuple(dev for dev in self.pci if dev.is_thunderbolt_host)
+
+    def has_thunderbolt(self) -> bool:
+        """
+        Return True if the host has Thunderbolt ports, even when the thunderbolt driver is not loaded.
+        """
+        return bool(self.thunderbolt or self.thunderbolt_hosts())
+
+    def has_firewire(self) -> bool:
+        """
+        Return True if a FireWire (IEEE 1394) controller is present.
+        """
+        return bool(self.pci_with_class(PCI_CLASS_FIREWIRE))
+
+    def webcams(self) -> Tuple[UsbDevice, ...]:
+        """
+        Return USB devices exposing a video interface.
+        """
+        return self.usb_with_interface(USB_CLASS_VIDEO)
+
+    def audio_devices(self) -> Tuple[Union[UsbDevice, PciDevice], ...]:
+        """
+        Return USB audio devices followed by PCI audio controllers.
+        """
+        return self.usb_with_interface(USB_CLASS_AUDIO) + self.pci_with_class(PCI_CLASS_AUDIO, PCI_CLASS_HDA)
+
+    def usbguard_policy(self) -> str:
+        """
+        Render an allow rule for every connected USB device, like `usbguard generate-policy`.
+        Rules pin the port instead of the descriptor hash, which only usbguard itself computes.
+
+        :return: The rules file contents.
+        """
+        lines = []
+        for dev in self.usb:
+            rule = (
+                f"allow id {dev.vendor_id}:{dev.product_id} serial {_policy_string(dev.serial)} "
+                f"name {_policy_string(dev.name)} via-port {_policy_string(dev.port)}"
+            )
+            interfaces = [f"{c:02x}:{s:02x}:{p:02x}" for c, s, p in dev.interfaces]
+            if len(interfaces) == 1:
+                rule += f" with-interface {interfaces[0]}"
+            elif interfaces:
+                rule += " with-interface { " + " ".join(interfaces) + " }"
+            lines.append(rule)
+        return "".join(line + "\n" for line in lines)
+
+
+@lru_cache(maxsize=None)
+def get_inventory(sysfs_root: str = DEFAULT_SYSFS_ROOT) -> DeviceInventory:
+    """
+    Return the inventory for sysfs_root, scanning it only on first use.
+    Call get_inventory.cache_clear() after hotplug to force a rescan.
+    """
+    return DeviceInventory.scan(sysfs_root)
@@ -1,12 +1,16 @@
 import subprocess
 import shutil
+from typing import Optional
 
-def harden_firewall(selected_option: str) -> bool:
+from archsecure.harden.systemd import SystemdError, SystemdManager
+
+def harden_firewall(selected_option: str, systemd: Optional[SystemdManager] = None) -> bool:
     """
     Harden the firewall based on the selected option.
     Options: "Use UFW", "Use NFtables", "Use iptables".
 
     :param selected_option: The selected firewall option.
+    :param systemd: An open SystemdManager to reuse; a new connection is opened if None.
     :return: True if the firewall is hardened successfully, False otherwise.
     """
     try:
@@ -45,18 +49,11 @@ def harden_firewall(selected_option: str) -> bool:
             # Check if nft is installed
             if not shutil.which("nft"):
                 return False
-            # Enable and start nftables via systemctl
-            subprocess.run(["sudo", "systemctl", "enable", "nftables"], check=True)
-            subprocess.run(["sudo", "systemctl", "start", "nftables"], check=True)
-            # Verify that nftables is active
-            proc = subprocess.run(
-                ["sudo", "systemctl", "is-active", "nftables"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            status = proc.stdout.decode().strip()
-            return status == "active"
+            # Enable and start nftables over one systemd connection
+            if systemd is not None:
+                return systemd.enable_and_start(["nftables.service"])
+            with SystemdManager() as manager:
+                return manager.enable_and_start(["nftables.service"])
 
         elif selected_option == "Use iptables":
             # Check if iptables is installed
@@ -90,5 +87,40 @@ def harden_firewall(selected_option: str) -> bool:
         else:
             return False
 
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, SystemdError):
+        return False
+
+def reload_firewall(selected_option: str, systemd: Optional[SystemdManager] = None) -> bool:
+    """
+    Re-apply an already hardened firewall, loading its rules again from the configuration files.
+    Unlike harden_firewall, this also takes effect when the firewall is already running.
+
+    :param selected_option: The selected firewall option.
+    :param systemd: An open SystemdManager to reuse; a new connection is opened if None.
+    :return: True if the firewall was re-applied successfully, False otherwise.
+    """
+    try:
+        if selected_option == "Use NFtables":
+            if not shutil.which("nft"):
+                return False
+            # StartUnit is a no-op for an active unit, so reload the ruleset instead
+            if systemd is not None:
+                results = systemd.reload_or_restart(["nftables.service"])
+            else:
+                with SystemdManager() as manager:
+                    results = manager.reload_or_restart(["nftables.service"])
+            return all(result == "done" for result in results.values())
+
+        if not harden_firewall(selected_option, systemd):
+            return False
+        if selected_option == "Use UFW":
+            subprocess.run(
+                ["sudo", "ufw", "reload"],
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        return True
+
+    except (subprocess.CalledProcessError, SystemdError):
         return False
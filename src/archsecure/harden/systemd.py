@@ -0,0 +1,236 @@
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+SYSTEMD_BUS_NAME = "org.freedesktop.systemd1"
+SYSTEMD_PATH = "/org/freedesktop/systemd1"
+MANAGER_INTERFACE = "org.freedesktop.systemd1.Manager"
+
+DEFAULT_JOB_TIMEOUT = 90.0  # seconds, matches systemd's default start timeout
+
+
+class SystemdError(Exception):
+    """
+    Raised when the systemd manager rejects a request or a job does not finish in time.
+    """
+
+
+class SystemBus:
+    """
+    A single connection to the systemd manager on the D-Bus system bus.
+
+    Calls carry the allow-interactive-authorization flag, so when not running as
+    root polkit prompts for credentials instead of denying the request outright.
+    The connection subscribes to the manager's JobRemoved signal as soon as it is
+    opened, so job completions that arrive while other calls are in flight are
+    queued rather than lost.
+    """
+    def __init__(self, bus: str = "SYSTEM") -> None:
+        """
+        Open the bus connection and subscribe to job signals.
+
+        :param bus: "SYSTEM", or the address of another bus (used for testing).
+        :raises SystemdError: If jeepney is missing or the bus cannot be reached.
+        """
+        try:
+            from jeepney import DBusAddress, MatchRule
+            from jeepney.bus_messages import message_bus
+            from jeepney.io.blocking import open_dbus_connection
+            from jeepney.wrappers import DBusErrorResponse, unwrap_msg
+        except ImportError as exc:
+            raise SystemdError("jeepney is required to talk to systemd") from exc
+
+        try:
+            self._conn = open_dbus_connection(bus=bus)
+        except OSError as exc:
+            raise SystemdError(f"cannot connect to the system bus: {exc}") from exc
+
+        self._manager = DBusAddress(SYSTEMD_PATH, bus_name=SYSTEMD_BUS_NAME, interface=MANAGER_INTERFACE)
+        rule = MatchRule(
+            type="signal",
+            sender=SYSTEMD_BUS_NAME,
+            interface=MANAGER_INTERFACE,
+            member="JobRemoved",
+            path=SYSTEMD_PATH,
+        )
+        try:
+            unwrap_msg(self._conn.send_and_get_reply(message_bus.AddMatch(rule)))
+            # Signals carry the sender's unique name, so filter locally on that
+            # rather than on the well-known name the bus matched on.
+            (owner,) = unwrap_msg(self._conn.send_and_get_reply(message_bus.GetNameOwner(SYSTEMD_BUS_NAME)))
+        except (DBusErrorResponse, OSError, TimeoutError) as exc:
+            self._conn.close()
+            raise SystemdError(f"cannot subscribe to systemd job signals: {exc}") from exc
+        rule.header_fields["sender"] = owner
+        self._jobs = self._conn.filter(rule, queue=deque())
+
+    def call(self, member: str, signature: str = "", body: tuple = ()) -> tuple:
+        """
+        Call a method on the systemd manager and return the reply body.
+
+        :param member: The manager method name, e.g. "StartUnit".
+        :param signature: The D-Bus signature of the arguments.
+        :param body: The method arguments.
+        :return: The reply body as a tuple.
+        :raises SystemdError: If systemd answers with an error or the connection fails.
+        """
+        from jeepney import MessageFlag, new_method_call
+        from jeepney.wrappers import DBusErrorResponse, unwrap_msg
+
+        msg = new_method_call(self._manager, member, signature, body)
+        # Let polkit ask an unprivileged user for credentials, like `sudo systemctl` would.
+        msg.header.flags |= MessageFlag.allow_interactive_authorization
+        try:
+            return unwrap_msg(self._conn.send_and_get_reply(msg))
+        except DBusErrorResponse as exc:
+            raise SystemdError(f"{member} failed: {exc}") from exc
+        except (OSError, TimeoutError) as exc:
+            raise SystemdError(f"{member} failed: lost connection to systemd: {exc}") from exc
+
+    def next_job_removed(self, timeout: float) -> Tuple[int, str, str, str]:
+        """
+        Block until the next JobRemoved signal arrives.
+
+        :param timeout: Seconds to wait before giving up.
+        :return: The signal body (id, job path, unit name, result).
+        :raises TimeoutError: If no signal arrives in time.
+        :raises SystemdError: If the connection fails.
+        """
+        try:
+            return self._conn.recv_until_filtered(self._jobs.queue, timeout=timeout).body
+        except TimeoutError:
+            raise
+        except OSError as exc:
+            raise SystemdError(f"lost connection to systemd: {exc}") from exc
+
+    def close(self) -> None:
+        """
+        Drop the signal subscription and close the connection.
+        """
+        self._jobs.close()
+        self._conn.close()
+
+
+def unit_name(name: str) -> str:
+    """
+    Return the full unit name, appending ".service" the way systemctl does for bare names.
+
+    :param name: A unit name such as "nftables" or "nftables.service".
+    :return: The full unit name.
+    """
+    return name if "." in name else f"{name}.service"
+
+
+class SystemdManager:
+    """
+    Batched unit operations over one connection to the systemd manager.
+    """
+    def __init__(self, bus=None, timeout: float = DEFAULT_JOB_TIMEOUT) -> None:
+        """
+        Initialize a SystemdManager.
+
+        :param bus: An object providing call(), next_job_removed() and close();
+                    defaults to a new SystemBus connection.
+        :param timeout: Seconds to wait for a batch of jobs to finish.
+        """
+        self._bus = bus if bus is not None else SystemBus()
+        self._subscribed = False
+        self.timeout = timeout
+
+    def __enter__(self) -> 'SystemdManager':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the underlying bus connection.
+        """
+        self._bus.close()
+
+    def enable(self, units: Iterable[str]) -> List[Tuple[str, str, str]]:
+        """
+        Enable unit files in a single request.
+
+        :param units: Unit names to enable.
+        :return: The (type, symlink, target) changes systemd reported; empty if already enabled.
+        """
+        names = [unit_name(unit) for unit in units]
+        if not names:
+            return []
+        _, changes = self._bus.call("EnableUnitFiles", "asbb", (names, False, False))
+        return list(changes)
+
+    def reload(self) -> None:
+        """
+        Reload the systemd manager configuration.
+        """
+        self._bus.call("Reload")
+
+    def start(self, units: Iterable[str]) -> Dict[str, str]:
+        """
+        Queue start jobs for all units and wait for every job to finish.
+        Units that are already active are left as they are.
+
+        :param units: Unit names to start.
+        :return: A mapping of unit name to job result ("done" on success).
+        :raises SystemdError: If the jobs do not finish within the timeout.
+        """
+        return self._run_jobs("StartUnit", units)
+
+    def reload_or_restart(self, units: Iterable[str]) -> Dict[str, str]:
+        """
+        Reload units that support it and restart the others, starting any that are inactive.
+
+        :param units: Unit names to reload or restart.
+        :return: A mapping of unit name to job result ("done" on success).
+        :raises SystemdError: If the jobs do not finish within the timeout.
+        """
+        return self._run_jobs("ReloadOrRestartUnit", units)
+
+    def _run_jobs(self, method: str, units: Iterable[str]) -> Dict[str, str]:
+        """
+        Queue one job per unit with the given manager method and wait for all of them.
+
+        :param method: A manager method taking (name, mode) and returning a job path.
+        :param units: Unit names to queue jobs for.
+        :return: A mapping of unit name to job result.
+        :raises SystemdError: If the jobs do not finish within the timeout.
+        """
+        if not self._subscribed:
+            # systemd only emits job signals to clients that asked for them.
+            self._bus.call("Subscribe")
+            self._subscribed = True
+
+        pending = {}
+        for unit in units:
+            (job,) = self._bus.call(method, "ss", (unit_name(unit), "replace"))
+            pending[job] = unit_name(unit)
+
+        results = {}
+        deadline = time.monotonic() + self.timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SystemdError(f"timed out waiting for {', '.join(sorted(pending.values()))}")
+            try:
+                _, job, unit, result = self._bus.next_job_removed(remaining)
+            except TimeoutError:
+                continue
+            if job in pending:
+                results[pending.pop(job)] = result
+        return results
+
+    def enable_and_start(self, units: Iterable[str]) -> bool:
+        """
+        Enable and start units, reloading the manager once if any unit file changed.
+
+        :param units: Unit names to enable and start.
+        :return: True if every start job finished successfully, False otherwise.
+        """
+        units = list(units)
+        if self.enable(units):
+            self.reload()
+        results = self.start(units)
+        return all(result == "done" for result in results.values())
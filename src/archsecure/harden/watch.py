@@ -0,0 +1,501 @@
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import subprocess
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from archsecure.harden import firewall
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+# Directories are watched rather than files so that editors replacing a file
+# by rename are still noticed.
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+# Events after which the set of watched directories has to be recomputed.
+RESTRUCTURE_MASK = IN_ISDIR | IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED | IN_Q_OVERFLOW
+
+_EVENT = struct.Struct("iIII")
+
+DEFAULT_POLL_INTERVAL = 60.0  # seconds between runtime probes
+DEFAULT_SETTLE = 0.5  # seconds of quiet before re-applying after a file event
+MAX_SETTLE = 5.0
+
+PROC_SYS_ROOT = "/proc/sys"
+
+# Runtime values that can drift without any managed file changing.
+KERNEL_RUNTIME_KEYS = (
+    "kernel.kptr_restrict",
+    "kernel.dmesg_restrict",
+    "kernel.unprivileged_bpf_disabled",
+    "kernel.yama.ptrace_scope",
+    "net.ipv4.tcp_timestamps",
+    "net.ipv4.conf.all.rp_filter",
+)
+
+KERNEL_PATHS = ("/etc/sysctl.d", "/etc/modprobe.d", "/etc/fstab")
+APPARMOR_PATHS = ("/etc/default/grub",)
+
+FIREWALL_PATHS = {
+    "Use UFW": ("/etc/ufw", "/etc/default/ufw"),
+    "Use NFtables": ("/etc/nftables.conf",),
+    "Use iptables": ("/etc/iptables",),
+}
+
+NFTABLES_CONF = "/etc/nftables.conf"
+_NFT_TABLE = re.compile(
+    r"^\s*(?:add\s+|create\s+)?table\s+(?:(ip|ip6|inet|arp|bridge|netdev)\s+)?([\w.-]+)", re.MULTILINE
+)
+
+
+class Event(NamedTuple):
+    path: Optional[str]  # None for a queue overflow
+    mask: int
+
+
+class Inotify:
+    """
+    A thin wrapper around the Linux inotify API.
+    """
+    def __init__(self) -> None:
+        """
+        Create a non-blocking inotify instance.
+
+        :raises OSError: If inotify is unavailable.
+        """
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._dirs = {}
+        self._poller = select.poll()
+        self._poller.register(self._fd, select.POLLIN)
+
+    @property
+    def watched(self) -> Set[str]:
+        """
+        The directories currently being watched.
+        """
+        return set(self._dirs.values())
+
+    def add_watch(self, directory: str) -> bool:
+        """
+        Watch a directory for changes to its entries.
+
+        :param directory: The directory to watch.
+        :return: True if the watch was added, False if the directory does not exist.
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            return False
+        self._dirs[wd] = directory
+        return True
+
+    def remove_watch(self, directory: str) -> None:
+        """
+        Stop watching a directory.
+
+        :param directory: A directory previously passed to add_watch().
+        """
+        for wd, watched in list(self._dirs.items()):
+            if watched == directory:
+                del self._dirs[wd]
+                self._libc.inotify_rm_watch(self._fd, wd)
+
+    def read(self, timeout: float) -> List[Event]:
+        """
+        Wait for events and return them.
+
+        :param timeout: Seconds to wait; 0 returns immediately.
+        :return: The events, empty on timeout. Events on a watched directory itself
+                 carry the directory as path.
+        """
+        if not self._poller.poll(max(0, int(timeout * 1000))):
+            return []
+        events = []
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    events.append(Event(None, mask))
+                elif wd in self._dirs:
+                    directory = self._dirs[wd]
+                    if mask & IN_IGNORED:
+                        # The kernel dropped the watch (directory deleted or unmounted).
+                        del self._dirs[wd]
+                    elif mask & IN_MOVE_SELF:
+                        # The watch would follow the directory to its new name.
+                        del self._dirs[wd]
+                        self._libc.inotify_rm_watch(self._fd, wd)
+                    events.append(Event(os.path.join(directory, name) if name else directory, mask))
+        return events
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class Step:
+    """
+    A hardening step the watcher keeps applied.
+    """
+    def __init__(self, name: str, paths: Iterable[str], apply: Optional[Callable[[], bool]] = None,
+                 probe: Optional[Callable[[], object]] = None, target: object = None) -> None:
+        """
+        Initialize a Step.
+
+        :param name: The step name, as shown in the main menu.
+        :param paths: Files or directories the step manages.
+        :param apply: Re-applies the step and returns True on success. Without it the
+                      step is detect-only: drift is reported but nothing is re-applied.
+        :param probe: Optional cheap read of volatile runtime state, returning None
+                      when the state cannot be read.
+        :param target: The probe value of the hardened state. If None, drift is a change
+                       from the value seen when watching started or after the managed
+                       files were last re-applied.
+        """
+        self.name = name
+        self.paths = tuple(os.path.normpath(path) for path in paths)
+        self.apply = apply
+        self.probe = probe
+        self.target = target
+
+    def manages(self, path: str) -> bool:
+        """
+        Return True if path is one of the step's files or lies under one of its directories.
+        """
+        return any(path == managed or path.startswith(managed + os.sep) for managed in self.paths)
+
+
+class DriftWatcher:
+    """
+    Re-applies steps whose files change or whose runtime state drifts.
+
+    Managed directories are watched recursively. A path that does not exist yet is
+    covered by watching its nearest existing parent, and watches are recomputed
+    whenever a directory is created, moved or removed.
+    """
+    def __init__(self, steps: Iterable[Step], poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 settle: float = DEFAULT_SETTLE, inotify: Optional[Inotify] = None) -> None:
+        """
+        Initialize a DriftWatcher and register watches for every managed path.
+
+        :param steps: The steps to keep applied.
+        :param poll_interval: Seconds between runtime probes.
+        :param settle: Seconds without events to wait before re-applying.
+        :param inotify: An Inotify instance; a new one is created if None.
+        """
+        self.steps = list(steps)
+        self.poll_interval = poll_interval
+        self.settle = settle
+        self._inotify = inotify if inotify is not None else Inotify()
+        self._baseline = {}
+        # Probe values a re-apply could not fix; not retried until the value changes.
+        self._failed = {}
+        self._pending = []
+        self._next_poll = 0.0
+        self._update_watches()
+
+    def _wanted_dirs(self) -> Set[str]:
+        wanted = set()
+        for step in self.steps:
+            for path in step.paths:
+                if os.path.isdir(path):
+                    wanted.update(root for root, _, _ in os.walk(path))
+                    continue
+                directory = os.path.dirname(path)
+                while not os.path.isdir(directory) and directory != os.path.dirname(directory):
+                    directory = os.path.dirname(directory)
+                wanted.add(directory)
+        return wanted
+
+    def _update_watches(self) -> None:
+        wanted = self._wanted_dirs()
+        for directory in self._inotify.watched - wanted:
+            self._inotify.remove_watch(directory)
+        for directory in wanted:
+            # Re-adding an existing watch is harmless and picks up replaced directories.
+            self._inotify.add_watch(directory)
+
+    def _affected(self, events: List[Event]) -> Set[str]:
+        if any(event.mask & RESTRUCTURE_MASK for event in events):
+            self._update_watches()
+        if any(event.path is None for event in events):
+            return {step.name for step in self.steps}
+        return {
+            step.name for step in self.steps
+            if any(step.manages(event.path) for event in events)
+        }
+
+    def _expected(self, step: Step) -> object:
+        return step.target if step.target is not None else self._baseline.get(step.name)
+
+    def _drifted(self) -> Dict[str, object]:
+        drifted = {}
+        for step in self.steps:
+            if step.probe is None:
+                continue
+            value = step.probe()
+            if value is None:
+                # State unknown this time (tool missing or failing); try again next poll.
+                continue
+            if step.target is None and self._baseline.get(step.name) is None:
+                self._baseline[step.name] = value
+            elif value == self._expected(step):
+                self._failed.pop(step.name, None)
+            elif step.name not in self._failed or self._failed[step.name] != value:
+                drifted[step.name] = value
+        return drifted
+
+    def _reapply(self, step: Step, changed_files: bool) -> bool:
+        result = bool(step.apply())
+        if step.probe is None:
+            return result
+        value = step.probe()
+        if value is None:
+            return result
+        if step.target is None and ((changed_files and result) or self._expected(step) is None):
+            # The managed files define the hardened state, so track their new effect.
+            self._baseline[step.name] = value
+        elif value != self._expected(step):
+            self._failed[step.name] = value
+            return False
+        self._failed.pop(step.name, None)
+        return result
+
+    @property
+    def next_timeout(self) -> float:
+        """
+        Seconds until the next runtime probe is due.
+        """
+        return max(0.0, self._next_poll - time.monotonic())
+
+    def start(self) -> None:
+        """
+        Record the runtime baseline of steps without a fixed target; the host is
+        assumed to be hardened at this point.
+        """
+        self._baseline = {
+            step.name: step.probe() for step in self.steps
+            if step.probe is not None and step.target is None
+        }
+        self._failed = {}
+        self._next_poll = time.monotonic() + self.poll_interval
+
+    def check(self, timeout: float) -> Dict[str, Optional[bool]]:
+        """
+        Wait up to timeout for drift and re-apply the affected steps.
+        A step counts as failed if its probe still differs from the expected value afterwards.
+
+        :param timeout: Seconds to block waiting for file events.
+        :return: A mapping of drifted step names to whether the re-apply succeeded,
+                 or None for detect-only steps.
+        """
+        events = self._pending or self._inotify.read(timeout)
+        self._pending = []
+        changed = self._affected(events)
+        if changed:
+            # Let a burst of writes (package upgrades, editors) finish first.
+            deadline = time.monotonic() + MAX_SETTLE
+            while time.monotonic() < deadline:
+                more = self._inotify.read(self.settle)
+                if not more:
+                    break
+                changed |= self._affected(more)
+
+        drifted = {}
+        if time.monotonic() >= self._next_poll:
+            drifted = self._drifted()
+            self._next_poll = time.monotonic() + self.poll_interval
+
+        results = {}
+        for step in self.steps:
+            if step.name not in changed and step.name not in drifted:
+                continue
+            if step.apply is None:
+                if step.name in drifted:
+                    # Report runtime drift once per value, as for a failed re-apply.
+                    self._failed[step.name] = drifted[step.name]
+                results[step.name] = None
+            else:
+                results[step.name] = self._reapply(step, step.name in changed)
+
+        if any(step.apply is not None for step in self.steps if step.name in results):
+            # Drop the events our own re-apply produced, but keep edits to other steps' files.
+            reapplied = [step for step in self.steps if step.name in results and step.apply is not None]
+            for event in self._inotify.read(0):
+                if event.mask & RESTRUCTURE_MASK:
+                    self._update_watches()
+                if event.path is None or not any(step.manages(event.path) for step in reapplied):
+                    self._pending.append(event)
+        return results
+
+    def run(self, report: Optional[Callable[[str, Optional[bool]], None]] = None) -> None:
+        """
+        Watch until interrupted. Blocks in poll() between events, so idle cost is near zero.
+
+        :param report: Called with the step name and result (see check()) for every drift.
+        """
+        self.start()
+        try:
+            while True:
+                for name, result in self.check(self.next_timeout).items():
+                    if report is not None:
+                        report(name, result)
+        finally:
+            self._inotify.close()
+
+
+def read_sysctl(keys: Iterable[str], proc_root: str = PROC_SYS_ROOT) -> tuple:
+    """
+    Read sysctl values straight from /proc/sys.
+
+    :param keys: Dotted sysctl names.
+    :param proc_root: Where /proc/sys is mounted.
+    :return: The values in key order, None for keys the kernel does not have.
+    """
+    values = []
+    for key in keys:
+        try:
+            with open(os.path.join(proc_root, *key.split("."))) as f:
+                values.append(f.read().strip())
+        except OSError:
+            values.append(None)
+    return tuple(values)
+
+
+def _output(cmd: List[str]) -> Optional[str]:
+    """
+    Run a status command, returning its output or None if it cannot run or fails.
+    """
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    if proc.returncode != 0:
+        return None
+    return proc.stdout.decode(errors="replace")
+
+
+def nftables_tables(conf_path: str = NFTABLES_CONF) -> List[Tuple[str, str]]:
+    """
+    List the (family, name) of every table the nftables configuration defines.
+    Tables declared in included files are not followed.
+
+    :param conf_path: The nftables configuration file.
+    :return: The tables in declaration order.
+    """
+    try:
+        with open(conf_path) as f:
+            text = f.read()
+    except OSError:
+        return []
+    tables = []
+    for family, name in _NFT_TABLE.findall(text):
+        table = (family or "ip", name)
+        if table not in tables:
+            tables.append(table)
+    return tables
+
+
+def nftables_state(conf_path: str = NFTABLES_CONF) -> Optional[tuple]:
+    """
+    Read the loaded rules of the tables the nftables configuration defines.
+    Tables owned by other software (docker, libvirt, fail2ban) are left out, and
+    counters and set elements are omitted since they change at runtime.
+
+    :param conf_path: The nftables configuration file.
+    :return: One entry per configured table, None for tables that are not loaded.
+             None if nft cannot be run.
+    """
+    listing = _output(["nft", "list", "tables"])
+    if listing is None:
+        return None
+    loaded = {tuple(line.split()[1:3]) for line in listing.splitlines() if line.startswith("table ")}
+    state = []
+    for family, name in nftables_tables(conf_path):
+        if (family, name) not in loaded:
+            state.append(None)
+            continue
+        rules = _output(["nft", "-s", "-t", "list", "table", family, name])
+        if rules is None:
+            return None
+        state.append(rules)
+    return tuple(state)
+
+
+def firewall_state(selected_option: str) -> object:
+    """
+    Read the part of the firewall state that reload_firewall restores.
+
+    :param selected_option: The firewall option chosen in the menu.
+    :return: For UFW whether it is active, for NFtables the configured tables, and
+             for iptables whether INPUT has a DROP rule. None if the state cannot be read.
+    """
+    if selected_option == "Use NFtables":
+        return nftables_state()
+    if selected_option == "Use UFW":
+        output = _output(["ufw", "status"])
+        return None if output is None else output.lower().startswith("status: active")
+    output = _output(["iptables", "-S", "INPUT"])
+    return None if output is None else "-j drop" in output.lower()
+
+
+# The probe value of a hardened firewall, where it is known up front.
+FIREWALL_TARGETS = {
+    "Use UFW": True,
+    "Use NFtables": None,
+    "Use iptables": True,
+}
+
+
+def default_steps(firewall_option: Optional[str] = None, watch_kernel: bool = False,
+                  watch_apparmor: bool = False) -> List[Step]:
+    """
+    Build the steps to watch from the hardening options that were applied.
+    Kernel and AppArmor steps are detect-only until those hardening steps are implemented.
+    Probes run the firewall tools directly, so the watcher must run as root.
+
+    :param firewall_option: The firewall option chosen in the menu, e.g. "Use UFW".
+    :param watch_kernel: Watch the sysctl, modprobe and fstab settings.
+    :param watch_apparmor: Watch the GRUB defaults that enable AppArmor.
+    :return: The steps, in main menu order.
+    """
+    steps = []
+    if firewall_option is not None:
+        steps.append(Step(
+            "Harden Firewall",
+            FIREWALL_PATHS[firewall_option],
+            apply=lambda: firewall.reload_firewall(firewall_option),
+            probe=lambda: firewall_state(firewall_option),
+            target=FIREWALL_TARGETS[firewall_option],
+        ))
+    if watch_kernel:
+        steps.append(Step("Harden Kernel", KERNEL_PATHS, probe=lambda: read_sysctl(KERNEL_RUNTIME_KEYS)))
+    if watch_apparmor:
+        steps.append(Step("Install & Enable Apparmor", APPARMOR_PATHS))
+    return steps
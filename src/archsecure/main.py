@@ -1,8 +1,13 @@
+import argparse
 import curses
+import math
+import os
 import sys
+from typing import Optional
 
 from archsecure.ui.menu import build_menu_structure, run_menu
 from archsecure.harden.executor import execute_hardening
+from archsecure.harden.watch import DEFAULT_POLL_INTERVAL, DriftWatcher, default_steps
 
 def main(stdscr):
     curses.start_color()
@@ -26,5 +31,81 @@ def main(stdscr):
     else:
         sys.exit(0)
 
+FIREWALL_CHOICES = {
+    "ufw": "Use UFW",
+    "nftables": "Use NFtables",
+    "iptables": "Use iptables",
+}
+
+def report_drift(step: str, result: Optional[bool]) -> None:
+    """
+    Print the outcome of a drifted step.
+
+    :param step: The step name.
+    :param result: True if the step was restored, False if re-applying failed,
+                   None if the step is detect-only.
+    """
+    if result is None:
+        print(f"{step}: drift detected (not re-applied)", flush=True)
+    else:
+        print(f"{step}: drift detected, re-applied", "✔" if result else "error!", flush=True)
+
+def positive_float(value: str) -> float:
+    """
+    Parse a strictly positive number of seconds for argparse.
+
+    :param value: The command line value.
+    :return: The parsed value.
+    """
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+    if not (seconds > 0 and math.isfinite(seconds)):
+        raise argparse.ArgumentTypeError("must be a finite number greater than 0")
+    return seconds
+
+def watch(argv) -> None:
+    """
+    Run the drift watcher for the steps named on the command line.
+
+    :param argv: Arguments following "watch".
+    """
+    parser = argparse.ArgumentParser(prog="archsecure watch",
+                                     description="Re-apply hardening steps when their settings drift.")
+    parser.add_argument("--firewall", choices=FIREWALL_CHOICES, help="the firewall option that was applied")
+    parser.add_argument("--kernel", action="store_true",
+                        help="report drift in kernel sysctl, modprobe and fstab settings (detection only)")
+    parser.add_argument("--apparmor", action="store_true",
+                        help="report drift in the AppArmor GRUB defaults (detection only)")
+    parser.add_argument("--poll-interval", type=positive_float, default=DEFAULT_POLL_INTERVAL,
+                        help="seconds between runtime state checks")
+    args = parser.parse_args(argv)
+
+    steps = default_steps(
+        firewall_option=FIREWALL_CHOICES.get(args.firewall),
+        watch_kernel=args.kernel,
+        watch_apparmor=args.apparmor,
+    )
+    if not steps:
+        parser.error("nothing to watch")
+    # Probes and re-applies run the firewall tools directly.
+    if os.geteuid() != 0:
+        parser.error("must be run as root")
+    try:
+        DriftWatcher(steps, poll_interval=args.poll_interval).run(report_drift)
+    except KeyboardInterrupt:
+        pass
+
+def cli(argv=None) -> None:
+    """
+    Console entry point: "archsecure watch ..." runs the drift watcher, anything else the menu.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "watch":
+        watch(argv[1:])
+    else:
+        curses.wrapper(main)
+
 if __name__ == '__main__':
-    curses.wrapper(main)
+    cli()
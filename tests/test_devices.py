@@ -0,0 +1,98 @@
+import os
+
+from archsecure.harden.devices import DeviceInventory
+
+
+def write_attrs(path, **attrs):
+    os.makedirs(path, exist_ok=True)
+    for name, value in attrs.items():
+        with open(os.path.join(path, name), "w") as f:
+            f.write(value + "\n")
+
+
+def build_sysfs(root):
+    devices = root / "devices"
+    usb = root / "bus" / "usb" / "devices"
+    os.makedirs(usb)
+
+    # Root hub with a webcam behind it; bus entries are symlinks like the real sysfs.
+    hub = devices / "usb1"
+    write_attrs(hub, idVendor="1d6b", idProduct="0002", serial="0000:00:14.0", product="xHCI Host Controller")
+    write_attrs(hub / "1-0:1.0", bInterfaceClass="09", bInterfaceSubClass="00", bInterfaceProtocol="00")
+    cam = hub / "1-1"
+    write_attrs(cam, idVendor="046d", idProduct="0825", product='Webcam "C270"')
+    write_attrs(cam / "1-1:1.0", bInterfaceClass="0e", bInterfaceSubClass="01", bInterfaceProtocol="00")
+    write_attrs(cam / "1-1:1.2", bInterfaceClass="01", bInterfaceSubClass="01", bInterfaceProtocol="00")
+    for node in (hub, hub / "1-0:1.0", cam, cam / "1-1:1.0"):
+        os.symlink(node, usb / node.name)
+
+    write_attrs(root / "class" / "rfkill" / "rfkill0", name="phy0", type="wlan", soft="0", hard="0")
+    write_attrs(root / "class" / "rfkill" / "rfkill1", name="hci0", type="bluetooth", soft="1", hard="0")
+
+    write_attrs(root / "bus" / "thunderbolt" / "devices" / "domain0")
+    write_attrs(root / "bus" / "thunderbolt" / "devices" / "0-1", vendor_name="Dell", device_name="WD19TB",
+                authorized="0")
+
+    write_attrs(root / "bus" / "pci" / "devices" / "0000:03:00.0", **{"class": "0x0c0010", "vendor": "0x1217",
+                                                                        "device": "0x00f7"})
+    write_attrs(root / "bus" / "pci" / "devices" / "0000:00:1f.3", **{"class": "0x040300", "vendor": "0x8086",
+                                                                        "device": "0xa348"})
+
+
+def test_scan_builds_inventory_from_fixture(tmp_path):
+    build_sysfs(tmp_path)
+    inventory = DeviceInventory.scan(str(tmp_path))
+
+    assert [dev.port for dev in inventory.usb] == ["1-1", "usb1"]
+    assert inventory.usb[1].is_hub
+    assert [dev.port for dev in inventory.webcams()] == ["1-1"]
+    assert [dev.type for dev in inventory.wireless()] == ["wlan", "bluetooth"]
+    assert inventory.wireless("bluetooth")[0].soft_blocked
+    assert [dev.device_name for dev in inventory.thunderbolt] == ["WD19TB"]
+    assert not inventory.thunderbolt[0].authorized
+    assert inventory.has_thunderbolt()
+    assert inventory.has_firewire()
+    assert len(inventory.audio_devices()) == 2
+
+
+def test_thunderbolt_host_found_on_pci_without_driver(tmp_path):
+    pci = tmp_path / "bus" / "pci" / "devices"
+    # Titan Ridge NHI, USB4 host, and an I3C controller which must not match.
+    write_attrs(pci / "0000:05:00.0", **{"class": "0x088000", "vendor": "0x8086", "device": "0x15eb"})
+    write_attrs(pci / "0000:00:0d.2", **{"class": "0x0c0340", "vendor": "0x1022", "device": "0x162e"})
+    write_attrs(pci / "0000:00:15.4", **{"class": "0x0c0a00", "vendor": "0x8086", "device": "0x7e7c"})
+    write_attrs(pci / "0000:00:1f.4", **{"class": "0x088000", "vendor": "0x8086", "device": "0x7e22"})
+    inventory = DeviceInventory.scan(str(tmp_path))
+
+    assert inventory.thunderbolt == ()
+    assert [dev.address for dev in inventory.thunderbolt_hosts()] == ["0000:00:0d.2", "0000:05:00.0"]
+    assert inventory.has_thunderbolt()
+    others = [dev for dev in inventory.pci if dev.address in ("0000:00:15.4", "0000:00:1f.4")]
+    assert not DeviceInventory(pci=others).has_thunderbolt()
+
+
+def test_malformed_interface_class_is_skipped(tmp_path):
+    dev = tmp_path / "bus" / "usb" / "devices" / "1-2"
+    write_attrs(dev, idVendor="0bda", idProduct="8153")
+    write_attrs(dev / "1-2:1.0", bInterfaceClass="zz")
+    write_attrs(dev / "1-2:1.1", bInterfaceClass="ff", bInterfaceSubClass="ff", bInterfaceProtocol="00")
+
+    assert DeviceInventory.scan(str(tmp_path)).usb[0].interfaces == ((0xff, 0xff, 0x00),)
+
+
+def test_missing_sysfs_yields_empty_inventory(tmp_path):
+    inventory = DeviceInventory.scan(str(tmp_path))
+    assert inventory.usb == inventory.rfkill == inventory.thunderbolt == inventory.pci == ()
+    assert inventory.usbguard_policy() == ""
+
+
+def test_usbguard_policy(tmp_path):
+    build_sysfs(tmp_path)
+    policy = DeviceInventory.scan(str(tmp_path)).usbguard_policy()
+
+    assert policy.splitlines() == [
+        'allow id 046d:0825 serial "" name "Webcam \\"C270\\"" via-port "1-1" '
+        'with-interface { 0e:01:00 01:01:00 }',
+        'allow id 1d6b:0002 serial "0000:00:14.0" name "xHCI Host Controller" via-port "usb1" '
+        'with-interface 09:00:00',
+    ]
@@ -0,0 +1,65 @@
+import subprocess
+
+import pytest
+
+from archsecure.harden import firewall
+from archsecure.harden.systemd import SystemdManager
+from tests.test_systemd import FakeBus
+
+
+class FakeRun:
+    """
+    Records subprocess.run calls and answers them from a table of outputs.
+    """
+    def __init__(self, outputs=None):
+        self.outputs = outputs or {}
+        self.calls = []
+
+    def __call__(self, cmd, check=False, stdout=None, stderr=None):
+        self.calls.append(cmd)
+        returncode, output = self.outputs.get(tuple(cmd), (0, ""))
+        if check and returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
+        return subprocess.CompletedProcess(cmd, returncode, output.encode(), b"")
+
+
+@pytest.fixture
+def installed(monkeypatch):
+    monkeypatch.setattr(firewall.shutil, "which", lambda name: f"/usr/bin/{name}")
+
+
+def test_reload_ufw_enables_if_needed_and_reloads_rules(monkeypatch, installed):
+    run = FakeRun({("ufw", "status"): (0, "Status: active\n")})
+    monkeypatch.setattr(firewall.subprocess, "run", run)
+
+    assert firewall.reload_firewall("Use UFW")
+    assert run.calls == [["ufw", "status"], ["sudo", "ufw", "reload"]]
+
+
+def test_reload_ufw_reports_failed_reload(monkeypatch, installed):
+    run = FakeRun({("ufw", "status"): (0, "Status: active\n"), ("sudo", "ufw", "reload"): (1, "")})
+    monkeypatch.setattr(firewall.subprocess, "run", run)
+
+    assert not firewall.reload_firewall("Use UFW")
+
+
+def test_reload_nftables_uses_reload_or_restart(monkeypatch, installed):
+    run = FakeRun()
+    monkeypatch.setattr(firewall.subprocess, "run", run)
+    bus = FakeBus()
+
+    assert firewall.reload_firewall("Use NFtables", SystemdManager(bus))
+    assert [member for member, _ in bus.calls] == ["Subscribe", "ReloadOrRestartUnit"]
+    assert bus.calls[1][1] == ("nftables.service", "replace")
+    assert run.calls == []
+
+
+def test_reload_nftables_failed_job(installed):
+    bus = FakeBus(results={"nftables.service": "failed"})
+    assert not firewall.reload_firewall("Use NFtables", SystemdManager(bus))
+
+
+def test_reload_without_tool_fails(monkeypatch):
+    monkeypatch.setattr(firewall.shutil, "which", lambda name: None)
+    assert not firewall.reload_firewall("Use NFtables", SystemdManager(FakeBus()))
+    assert not firewall.reload_firewall("Use UFW")
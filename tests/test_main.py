@@ -0,0 +1,63 @@
+import pytest
+
+from archsecure import main
+
+
+@pytest.fixture
+def watcher(monkeypatch):
+    """
+    Replace DriftWatcher with a recorder and pretend to run as root.
+    """
+    created = []
+
+    class FakeWatcher:
+        def __init__(self, steps, poll_interval):
+            self.steps = steps
+            self.poll_interval = poll_interval
+            created.append(self)
+
+        def run(self, report):
+            self.report = report
+
+    monkeypatch.setattr(main, "DriftWatcher", FakeWatcher)
+    monkeypatch.setattr(main.os, "geteuid", lambda: 0)
+    return created
+
+
+def test_cli_dispatches_watch(watcher):
+    main.cli(["watch", "--firewall", "nftables", "--kernel", "--poll-interval", "30"])
+
+    (created,) = watcher
+    assert [step.name for step in created.steps] == ["Harden Firewall", "Harden Kernel"]
+    assert created.poll_interval == 30
+    assert created.report is main.report_drift
+
+
+@pytest.mark.parametrize("interval", ["0", "-5", "inf", "soon"])
+def test_watch_rejects_bad_poll_interval(watcher, interval):
+    with pytest.raises(SystemExit):
+        main.cli(["watch", "--firewall", "ufw", "--poll-interval", interval])
+    assert watcher == []
+
+
+def test_watch_needs_something_to_watch(watcher):
+    with pytest.raises(SystemExit):
+        main.cli(["watch"])
+
+
+def test_watch_requires_root(watcher, monkeypatch):
+    monkeypatch.setattr(main.os, "geteuid", lambda: 1000)
+    with pytest.raises(SystemExit):
+        main.cli(["watch", "--firewall", "ufw"])
+    assert watcher == []
+
+
+def test_report_drift(capsys):
+    main.report_drift("Harden Firewall", True)
+    main.report_drift("Harden Firewall", False)
+    main.report_drift("Harden Kernel", None)
+    assert capsys.readouterr().out.splitlines() == [
+        "Harden Firewall: drift detected, re-applied ✔",
+        "Harden Firewall: drift detected, re-applied error!",
+        "Harden Kernel: drift detected (not re-applied)",
+    ]
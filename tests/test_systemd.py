@@ -0,0 +1,215 @@
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+
+import pytest
+
+from archsecure.harden.systemd import (MANAGER_INTERFACE, SYSTEMD_BUS_NAME, SYSTEMD_PATH, SystemBus,
+                                       SystemdError, SystemdManager, unit_name)
+
+
+class FakeBus:
+    """
+    Stands in for the systemd manager: records calls and emits JobRemoved for started units.
+    """
+    def __init__(self, results=None, changes=None):
+        self.results = results or {}
+        self.changes = changes if changes is not None else [("symlink", "/etc/x", "/usr/x")]
+        self.calls = []
+        self.signals = deque()
+        self.closed = False
+
+    def call(self, member, signature="", body=()):
+        self.calls.append((member, body))
+        if member == "EnableUnitFiles":
+            return (True, self.changes)
+        if member in ("StartUnit", "ReloadOrRestartUnit"):
+            unit = body[0]
+            job = f"/org/freedesktop/systemd1/job/{len(self.calls)}"
+            # An unrelated job finishing first must be ignored.
+            self.signals.append((0, "/org/freedesktop/systemd1/job/0", "other.service", "done"))
+            self.signals.append((len(self.calls), job, unit, self.results.get(unit, "done")))
+            return (job,)
+        return ()
+
+    def next_job_removed(self, timeout):
+        if not self.signals:
+            raise TimeoutError
+        return self.signals.popleft()
+
+    def close(self):
+        self.closed = True
+
+
+def members(bus):
+    return [member for member, _ in bus.calls]
+
+
+def test_unit_name_appends_service_suffix():
+    assert unit_name("nftables") == "nftables.service"
+    assert unit_name("usbguard.socket") == "usbguard.socket"
+
+
+def test_enable_and_start_batches_units_and_reloads_once():
+    bus = FakeBus()
+    with SystemdManager(bus) as manager:
+        assert manager.enable_and_start(["nftables", "haveged.service"])
+
+    assert members(bus) == ["EnableUnitFiles", "Reload", "Subscribe", "StartUnit", "StartUnit"]
+    assert bus.calls[0][1] == (["nftables.service", "haveged.service"], False, False)
+    assert bus.closed
+
+
+def test_no_reload_when_units_already_enabled():
+    bus = FakeBus(changes=[])
+    assert SystemdManager(bus).enable_and_start(["nftables"])
+    assert "Reload" not in members(bus)
+
+
+def test_failed_job_is_reported():
+    bus = FakeBus(results={"nftables.service": "failed"})
+    assert not SystemdManager(bus).enable_and_start(["nftables", "haveged"])
+
+
+def test_reload_or_restart_waits_for_jobs():
+    bus = FakeBus(results={"nftables.service": "failed"})
+    results = SystemdManager(bus).reload_or_restart(["nftables", "haveged"])
+
+    assert members(bus) == ["Subscribe", "ReloadOrRestartUnit", "ReloadOrRestartUnit"]
+    assert results == {"nftables.service": "failed", "haveged.service": "done"}
+
+
+def test_start_times_out_without_job_signal():
+    bus = FakeBus()
+    bus.next_job_removed = lambda timeout: (_ for _ in ()).throw(TimeoutError)
+    manager = SystemdManager(bus, timeout=0.01)
+    with pytest.raises(SystemdError):
+        manager.start(["nftables"])
+
+
+BUS_CONFIG = """<!DOCTYPE busconfig PUBLIC "-//freedesktop//DTD D-Bus Bus Configuration 1.0//EN"
+ "http://www.freedesktop.org/standards/dbus/1.0/busconfig.dtd">
+<busconfig>
+  <type>session</type>
+  <listen>unix:path={socket}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+"""
+
+
+@pytest.fixture
+def bus_address(tmp_path):
+    """
+    Start a private dbus-daemon and return its address.
+    """
+    daemon = shutil.which("dbus-daemon")
+    if daemon is None:
+        pytest.skip("dbus-daemon is not installed")
+    socket = tmp_path / "bus"
+    config = tmp_path / "bus.conf"
+    config.write_text(BUS_CONFIG.format(socket=socket))
+    proc = subprocess.Popen([daemon, "--nofork", "--config-file", str(config)])
+    deadline = time.monotonic() + 5
+    while not socket.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield f"unix:path={socket}"
+    proc.terminate()
+    proc.wait()
+
+
+class StubSystemd(threading.Thread):
+    """
+    A fake org.freedesktop.systemd1 manager on the test bus.
+    """
+    def __init__(self, address, results=None):
+        super().__init__(daemon=True)
+        from jeepney.bus_messages import message_bus
+        from jeepney.io.blocking import open_dbus_connection
+
+        self.conn = open_dbus_connection(bus=address)
+        self.conn.send_and_get_reply(message_bus.RequestName(SYSTEMD_BUS_NAME))
+        self.results = results or {}
+        self.calls = []
+        self.running = True
+
+    def handle(self, msg):
+        from jeepney import DBusAddress, new_error, new_method_return, new_signal
+        from jeepney.low_level import HeaderFields
+
+        member = msg.header.fields[HeaderFields.member]
+        self.calls.append((member, msg.header.flags, msg.body))
+        if member == "StartUnit":
+            unit = msg.body[0]
+            if unit == "missing.service":
+                self.conn.send(new_error(msg, "org.freedesktop.systemd1.NoSuchUnit", "s", ("not found",)))
+                return
+            job = f"/org/freedesktop/systemd1/job/{len(self.calls)}"
+            self.conn.send(new_method_return(msg, "o", (job,)))
+            emitter = DBusAddress(SYSTEMD_PATH, interface=MANAGER_INTERFACE)
+            self.conn.send(new_signal(emitter, "JobRemoved", "uoss",
+                                      (len(self.calls), job, unit, self.results.get(unit, "done"))))
+        else:
+            self.conn.send(new_method_return(msg))
+
+    def run(self):
+        from jeepney import MessageType
+
+        while self.running:
+            try:
+                msg = self.conn.receive(timeout=0.1)
+            except TimeoutError:
+                continue
+            except OSError:
+                break
+            if msg.header.message_type == MessageType.method_call:
+                self.handle(msg)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        self.conn.close()
+
+
+def test_system_bus_against_stub_systemd(bus_address):
+    pytest.importorskip("jeepney")
+    from jeepney import MessageFlag
+
+    stub = StubSystemd(bus_address, results={"haveged.service": "failed"})
+    stub.start()
+    try:
+        with SystemdManager(SystemBus(bus_address), timeout=5) as manager:
+            results = manager.start(["nftables", "haveged"])
+            with pytest.raises(SystemdError):
+                manager.start(["missing"])
+    finally:
+        stub.stop()
+
+    assert results == {"nftables.service": "done", "haveged.service": "failed"}
+    assert [member for member, _, _ in stub.calls] == ["Subscribe", "StartUnit", "StartUnit", "StartUnit"]
+    assert all(flags & MessageFlag.allow_interactive_authorization for _, flags, _ in stub.calls)
+
+
+def test_system_bus_without_systemd_raises(bus_address):
+    pytest.importorskip("jeepney")
+    with pytest.raises(SystemdError):
+        SystemBus(bus_address)
+
+
+def test_lost_connection_becomes_systemd_error(bus_address):
+    pytest.importorskip("jeepney")
+    stub = StubSystemd(bus_address)
+    stub.start()
+    try:
+        bus = SystemBus(bus_address)
+        bus._conn.sock.close()
+        with pytest.raises(SystemdError):
+            bus.call("Subscribe")
+    finally:
+        stub.stop()
@@ -0,0 +1,198 @@
+import subprocess
+
+from archsecure.harden import watch
+from archsecure.harden.watch import DriftWatcher, Step, read_sysctl
+
+
+class Recorder:
+    def __init__(self, result=True, effect=None):
+        self.calls = 0
+        self.result = result
+        self.effect = effect
+
+    def __call__(self):
+        self.calls += 1
+        if self.effect is not None:
+            self.effect()
+        return self.result
+
+
+def test_file_change_reapplies_only_affected_step(tmp_path):
+    sysctl_dir = tmp_path / "sysctl.d"
+    sysctl_dir.mkdir()
+    grub = tmp_path / "grub"
+    grub.write_text("GRUB_CMDLINE_LINUX=\"apparmor=1\"\n")
+    kernel, apparmor = Recorder(), Recorder()
+
+    watcher = DriftWatcher([
+        Step("Harden Kernel", [str(sysctl_dir)], apply=kernel),
+        Step("Install & Enable Apparmor", [str(grub)], apply=apparmor),
+    ], poll_interval=3600, settle=0.01)
+    watcher.start()
+
+    assert watcher.check(0) == {}
+    (sysctl_dir / "99-hardening.conf").write_text("kernel.kptr_restrict = 0\n")
+    (tmp_path / "unrelated").write_text("x")
+
+    assert watcher.check(1) == {"Harden Kernel": True}
+    assert (kernel.calls, apparmor.calls) == (1, 0)
+
+
+def test_runtime_drift_is_detected_by_probe(tmp_path):
+    state = {"value": "2"}
+    apply = Recorder(effect=lambda: state.update(value="2"))
+    watcher = DriftWatcher([Step("Harden Kernel", [str(tmp_path)], apply=apply, probe=lambda: state["value"])],
+                           poll_interval=0)
+    watcher.start()
+
+    assert watcher.check(0) == {}
+    state["value"] = "0"
+    assert watcher.check(0) == {"Harden Kernel": True}
+    assert watcher.check(0) == {}
+    assert apply.calls == 1
+
+
+def test_unfixed_drift_fails_once_until_value_changes(tmp_path):
+    state = {"value": "2"}
+    apply = Recorder()
+    watcher = DriftWatcher([Step("Harden Kernel", [str(tmp_path)], apply=apply, probe=lambda: state["value"])],
+                           poll_interval=0)
+    watcher.start()
+
+    state["value"] = "0"
+    assert watcher.check(0) == {"Harden Kernel": False}
+    assert watcher.check(0) == {}
+    assert watcher.check(0) == {}
+    state["value"] = "1"
+    assert watcher.check(0) == {"Harden Kernel": False}
+    assert apply.calls == 2
+
+
+def test_reapply_keeps_events_for_other_steps(tmp_path):
+    ufw, sysctl_dir = tmp_path / "ufw", tmp_path / "sysctl.d"
+    ufw.mkdir()
+    sysctl_dir.mkdir()
+    # Re-applying the firewall rewrites its own file while someone edits sysctl.d.
+    firewall = Recorder(effect=lambda: ((ufw / "user.rules").write_text("rules"),
+                                        (sysctl_dir / "10.conf").write_text("x")))
+    kernel = Recorder()
+    watcher = DriftWatcher([
+        Step("Harden Firewall", [str(ufw)], apply=firewall),
+        Step("Harden Kernel", [str(sysctl_dir)], apply=kernel),
+    ], poll_interval=3600, settle=0.01)
+    watcher.start()
+
+    (ufw / "ufw.conf").write_text("ENABLED=yes\n")
+    assert watcher.check(1) == {"Harden Firewall": True}
+    assert watcher.check(0) == {"Harden Kernel": True}
+    assert watcher.check(0) == {}
+
+
+def test_directories_created_later_are_watched(tmp_path):
+    iptables = tmp_path / "iptables"
+    apply = Recorder()
+    watcher = DriftWatcher([Step("Harden Firewall", [str(iptables)], apply=apply)], poll_interval=3600, settle=0.01)
+    watcher.start()
+
+    iptables.mkdir()
+    assert watcher.check(1) == {"Harden Firewall": True}
+    (iptables / "rules.d").mkdir()
+    watcher.check(1)
+    (iptables / "rules.d" / "iptables.rules").write_text("-A INPUT -j DROP\n")
+    assert watcher.check(1) == {"Harden Firewall": True}
+
+
+def test_read_sysctl(tmp_path):
+    (tmp_path / "kernel").mkdir()
+    (tmp_path / "kernel" / "kptr_restrict").write_text("2\n")
+    assert read_sysctl(["kernel.kptr_restrict", "kernel.missing"], str(tmp_path)) == ("2", None)
+
+
+def test_fixed_target_is_restored_even_if_broken_at_start(tmp_path):
+    state = {"active": False}
+    apply = Recorder(effect=lambda: state.update(active=True))
+    watcher = DriftWatcher([Step("Harden Firewall", [str(tmp_path)], apply=apply,
+                                 probe=lambda: state["active"], target=True)], poll_interval=0)
+    watcher.start()
+
+    assert watcher.check(0) == {"Harden Firewall": True}
+    assert watcher.check(0) == {}
+
+
+def test_unknown_probe_value_is_skipped(tmp_path):
+    apply = Recorder()
+    watcher = DriftWatcher([Step("Harden Firewall", [str(tmp_path)], apply=apply,
+                                 probe=lambda: None, target=True)], poll_interval=0)
+    watcher.start()
+
+    assert watcher.check(0) == {}
+    assert apply.calls == 0
+
+
+def test_detect_only_step_reports_without_applying(tmp_path):
+    state = {"value": "2"}
+    grub = tmp_path / "grub"
+    watcher = DriftWatcher([
+        Step("Harden Kernel", [str(tmp_path / "sysctl.d")], probe=lambda: state["value"]),
+        Step("Install & Enable Apparmor", [str(grub)]),
+    ], poll_interval=0, settle=0.01)
+    watcher.start()
+
+    state["value"] = "0"
+    assert watcher.check(0) == {"Harden Kernel": None}
+    assert watcher.check(0) == {}
+    grub.write_text("GRUB_CMDLINE_LINUX=\"\"\n")
+    assert watcher.check(1) == {"Install & Enable Apparmor": None}
+
+
+def completed(returncode=0, stdout=""):
+    return subprocess.CompletedProcess([], returncode, stdout.encode(), b"")
+
+
+def test_firewall_state_parsing(monkeypatch):
+    outputs = {}
+    monkeypatch.setattr(watch.subprocess, "run", lambda cmd, **kwargs: outputs[tuple(cmd)])
+
+    outputs[("ufw", "status")] = completed(stdout="Status: active\n\nTo  Action  From\n")
+    assert watch.firewall_state("Use UFW") is True
+    outputs[("ufw", "status")] = completed(stdout="Status: inactive\n")
+    assert watch.firewall_state("Use UFW") is False
+    outputs[("ufw", "status")] = completed(1, "ERROR: You need to be root to run this script\n")
+    assert watch.firewall_state("Use UFW") is None
+
+    outputs[("iptables", "-S", "INPUT")] = completed(stdout="-P INPUT ACCEPT\n-A INPUT -j DROP\n")
+    assert watch.firewall_state("Use iptables") is True
+    outputs[("iptables", "-S", "INPUT")] = completed(stdout="-P INPUT ACCEPT\n")
+    assert watch.firewall_state("Use iptables") is False
+    outputs[("iptables", "-S", "INPUT")] = completed(4)
+    assert watch.firewall_state("Use iptables") is None
+
+
+def test_nftables_state_only_covers_configured_tables(monkeypatch, tmp_path):
+    conf = tmp_path / "nftables.conf"
+    conf.write_text("flush ruleset\n\ntable inet filter {\n  chain input {\n  }\n}\ntable nat {\n}\n")
+    outputs = {
+        ("nft", "list", "tables"): completed(stdout="table inet filter\ntable ip docker\n"),
+        ("nft", "-s", "-t", "list", "table", "inet", "filter"): completed(stdout="table inet filter {}\n"),
+    }
+    monkeypatch.setattr(watch.subprocess, "run", lambda cmd, **kwargs: outputs[tuple(cmd)])
+
+    assert watch.nftables_tables(str(conf)) == [("inet", "filter"), ("ip", "nat")]
+    assert watch.nftables_state(str(conf)) == ("table inet filter {}\n", None)
+
+    outputs[("nft", "list", "tables")] = completed(1)
+    assert watch.nftables_state(str(conf)) is None
+
+
+def test_default_steps():
+    assert watch.default_steps() == []
+
+    firewall_step, kernel_step, apparmor_step = watch.default_steps("Use UFW", True, True)
+    assert firewall_step.name == "Harden Firewall"
+    assert firewall_step.paths == ("/etc/ufw", "/etc/default/ufw")
+    assert firewall_step.target is True
+    assert kernel_step.apply is None and kernel_step.probe is not None
+    assert apparmor_step.apply is None and apparmor_step.paths == ("/etc/default/grub",)
+
+    (nft_step,) = watch.default_steps("Use NFtables")
+    assert nft_step.target is None